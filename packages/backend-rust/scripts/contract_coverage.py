@@ -3,29 +3,27 @@ from __future__ import annotations
 
 import argparse
 import json
+import os
 import re
 import sys
-from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable
+from typing import Iterable, NamedTuple
 
 
-@dataclass(frozen=True)
-class Endpoint:
-    method: str
+# Path comes first so endpoints sort by (path, method) without a key function.
+class Endpoint(NamedTuple):
     path: str
+    method: str
 
 
-@dataclass(frozen=True)
-class NestCall:
+class NestCall(NamedTuple):
     prefix: str
     module: str
 
 
-@dataclass
-class ParsedRouterFile:
-    endpoints: set[Endpoint]
-    nests: list[NestCall]
+class ParsedRouterFile(NamedTuple):
+    endpoints: frozenset[Endpoint]
+    nests: tuple[NestCall, ...]
 
 
 METHOD_NAMES: dict[str, str] = {
@@ -38,52 +36,65 @@ METHOD_NAMES: dict[str, str] = {
     "options": "OPTIONS",
 }
 
+# Rust string bodies are matched as `(?:\\.|[^"\\])*`. The negated class must exclude
+# both `"` and `\` so the two alternatives never overlap; loosening it to `[^"]`
+# makes the alternation ambiguous and backtracks exponentially on escaped input.
+_STR_LIT_RE = re.compile(rb'\s*"((?:\\.|[^"\\])*)"')
+_METHOD_RE = re.compile(rb"(?<![A-Za-z0-9_])(get|post|put|patch|delete|head|options)\s*\(")
+_ROUTER_MOD_RE = re.compile(
+    rb"(?<![A-Za-z0-9_])([A-Za-z_][A-Za-z0-9_]*(?:::[A-Za-z_][A-Za-z0-9_]*)*)::router\s*\("
+)
+_HEALTH_RE = re.compile(rb'health_paths\.push\(\s*"((?:\\.|[^"\\])*)"\s*\.to_string\(\)\s*\)')
+_UNESCAPE_RE = re.compile(rb"\\(.)", re.DOTALL)
+_RUST_ESCAPES: dict[bytes, bytes] = {
+    b'"': b'"',
+    b"'": b"'",
+    b"\\": b"\\",
+    b"n": b"\n",
+    b"r": b"\r",
+    b"t": b"\t",
+    b"0": b"\0",
+}
+
+# Scanner tokens: whole string literals (an unterminated one runs to the end of input)
+# and the delimiters that affect nesting. Everything else is skipped by the regex engine.
+_CALL_TOKEN_RE = re.compile(rb'"(?:\\.|[^"\\])*"?|[()]', re.DOTALL)
+_ARG_TOKEN_RE = re.compile(rb'"(?:\\.|[^"\\])*"?|[(),]', re.DOTALL)
+
 
 def _repo_root() -> Path:
     # .../packages/backend-rust/scripts/contract_coverage.py -> repo root
     return Path(__file__).resolve().parents[3]
 
 
-def _unescape_rust_string(raw: str) -> str:
-    return raw.replace("\\\\", "\\").replace('\\"', '"')
+def _unescape_rust_string(raw: bytes) -> str:
+    # Escapes without a single-byte mapping (`\x..`, `\u{..}`, line continuations) are kept verbatim.
+    return _UNESCAPE_RE.sub(lambda m: _RUST_ESCAPES.get(m.group(1), m.group(0)), raw).decode("utf-8")
 
 
-def _extract_string_literal(expr: str) -> str | None:
-    m = re.match(r'\s*"((?:\\.|[^"\\])*)"', expr)
+def _extract_string_literal(expr: bytes) -> str | None:
+    m = _STR_LIT_RE.match(expr)
     if not m:
         return None
     return _unescape_rust_string(m.group(1))
 
 
-def _split_top_level_comma(args: str) -> tuple[str, str] | None:
+def _split_top_level_comma(args: bytes) -> tuple[bytes, bytes] | None:
     depth = 0
-    in_str = False
-    esc = False
-    for i, ch in enumerate(args):
-        if in_str:
-            if esc:
-                esc = False
-            elif ch == "\\":
-                esc = True
-            elif ch == '"':
-                in_str = False
-            continue
-        if ch == '"':
-            in_str = True
-            continue
-        if ch == "(":
+    for m in _ARG_TOKEN_RE.finditer(args):
+        tok = m.group()
+        if tok == b"(":
             depth += 1
-            continue
-        if ch == ")":
+        elif tok == b")":
             depth = max(0, depth - 1)
-            continue
-        if ch == "," and depth == 0:
+        elif tok == b"," and depth == 0:
+            i = m.start()
             return args[:i], args[i + 1 :]
     return None
 
 
-def _extract_two_arg_calls(text: str, needle: str) -> list[tuple[str, str]]:
-    calls: list[tuple[str, str]] = []
+def _extract_two_arg_calls(text: bytes, needle: bytes) -> list[tuple[bytes, bytes]]:
+    calls: list[tuple[bytes, bytes]] = []
     i = 0
     while True:
         idx = text.find(needle, i)
@@ -91,26 +102,16 @@ def _extract_two_arg_calls(text: str, needle: str) -> list[tuple[str, str]]:
             break
         start = idx + len(needle)
         depth = 1
-        in_str = False
-        esc = False
-        j = start
-        while j < len(text) and depth > 0:
-            ch = text[j]
-            if in_str:
-                if esc:
-                    esc = False
-                elif ch == "\\":
-                    esc = True
-                elif ch == '"':
-                    in_str = False
-            else:
-                if ch == '"':
-                    in_str = True
-                elif ch == "(":
-                    depth += 1
-                elif ch == ")":
-                    depth -= 1
-            j += 1
+        j = len(text)
+        for m in _CALL_TOKEN_RE.finditer(text, start):
+            tok = m.group()
+            if tok == b"(":
+                depth += 1
+            elif tok == b")":
+                depth -= 1
+                if depth == 0:
+                    j = m.end()
+                    break
 
         args = text[start : j - 1]
         parts = _split_top_level_comma(args)
@@ -121,13 +122,10 @@ def _extract_two_arg_calls(text: str, needle: str) -> list[tuple[str, str]]:
     return calls
 
 
-def _extract_methods(router_expr: str) -> set[str]:
+def _extract_methods(router_expr: bytes) -> set[str]:
     methods: set[str] = set()
-    for m in re.finditer(
-        r"(?<![A-Za-z0-9_])(get|post|put|patch|delete|head|options)\s*\(",
-        router_expr,
-    ):
-        methods.add(METHOD_NAMES[m.group(1)])
+    for m in _METHOD_RE.finditer(router_expr):
+        methods.add(METHOD_NAMES[m.group(1).decode("ascii")])
     return methods
 
 
@@ -135,49 +133,45 @@ def _join_paths(prefix: str, path: str) -> str:
     if prefix == "":
         if path == "":
             return "/"
-        if not path.startswith("/"):
+        if path[0] != "/":
             path = "/" + path
-        if path != "/" and path.endswith("/"):
+        if len(path) > 1 and path[-1] == "/":
             return path.rstrip("/")
         return path
 
-    if not prefix.startswith("/"):
+    if prefix[0] != "/":
         prefix = "/" + prefix
-    if prefix != "/" and prefix.endswith("/"):
+    if len(prefix) > 1 and prefix[-1] == "/":
         prefix = prefix[:-1]
 
     if path == "/":
         return prefix
-    if not path.startswith("/"):
+    if path[:1] != "/":
         path = "/" + path
     if prefix == "/":
         return path
     return prefix + path
 
 
-def _extract_router_module(router_expr: str) -> str | None:
-    m = re.search(
-        r"(?<![A-Za-z0-9_])([A-Za-z_][A-Za-z0-9_]*(?:::[A-Za-z_][A-Za-z0-9_]*)*)::router\s*\(",
-        router_expr,
-    )
+def _extract_router_module(router_expr: bytes) -> str | None:
+    m = _ROUTER_MOD_RE.search(router_expr)
     if not m:
         return None
-    return m.group(1)
+    return m.group(1).decode("ascii")
 
 
-def _extract_endpoints_from_file(path: Path) -> ParsedRouterFile:
-    text = path.read_text(encoding="utf-8")
+def _extract_endpoints_from_file(text: bytes) -> ParsedRouterFile:
     endpoints: set[Endpoint] = set()
     nests: list[NestCall] = []
 
-    for route_path, expr in _extract_two_arg_calls(text, ".route("):
+    for route_path, expr in _extract_two_arg_calls(text, b".route("):
         path_literal = _extract_string_literal(route_path)
         if path_literal is None:
             continue
         for method in _extract_methods(expr):
-            endpoints.add(Endpoint(method=method, path=path_literal))
+            endpoints.add(Endpoint(path_literal, method))
 
-    for nest_prefix, expr in _extract_two_arg_calls(text, ".nest("):
+    for nest_prefix, expr in _extract_two_arg_calls(text, b".nest("):
         prefix_literal = _extract_string_literal(nest_prefix)
         if prefix_literal is None:
             continue
@@ -186,15 +180,16 @@ def _extract_endpoints_from_file(path: Path) -> ParsedRouterFile:
             continue
         nests.append(NestCall(prefix=prefix_literal, module=module))
 
-    return ParsedRouterFile(endpoints=endpoints, nests=nests)
+    return ParsedRouterFile(endpoints=frozenset(endpoints), nests=tuple(nests))
 
 
-def _resolve_module_file(routes_root: Path, current_file: Path, module: str) -> Path | None:
+def _resolve_module_file(
+    routes_root: Path, rust_files: frozenset[Path], base_dir: Path, module: str
+) -> Path | None:
     module = module.strip()
     if not module:
         return None
 
-    base_dir = current_file.parent
     parts = [part for part in module.split("::") if part]
 
     if parts[:2] == ["crate", "routes"]:
@@ -224,20 +219,28 @@ def _resolve_module_file(routes_root: Path, current_file: Path, module: str) ->
         add_candidates(routes_root)
 
     for candidate in candidates:
-        if candidate.exists():
+        if candidate in rust_files:
+            return candidate
+        # `super::` can climb out of the routes tree, which the scan does not cover.
+        if routes_root not in candidate.parents and candidate.exists():
             return candidate
 
     return None
 
 
-def _extract_health_prefixes(mod_text: str) -> list[str]:
-    prefixes = [
-        _unescape_rust_string(m)
-        for m in re.findall(
-            r'health_paths\.push\(\s*"((?:\\.|[^"\\])*)"\s*\.to_string\(\)\s*\)',
-            mod_text,
-        )
-    ]
+def _scan_rust_files(routes_root: Path) -> frozenset[Path]:
+    # One directory walk up front; module resolution is then a set lookup instead of a
+    # stat per candidate. Symlinked directories are followed, as `Path.exists()` would.
+    return frozenset(
+        Path(root) / name
+        for root, _, files in os.walk(routes_root, followlinks=True)
+        for name in files
+        if name.endswith(".rs")
+    )
+
+
+def _extract_health_prefixes(mod_text: bytes) -> list[str]:
+    prefixes = [_unescape_rust_string(m) for m in _HEALTH_RE.findall(mod_text)]
     return prefixes
 
 
@@ -245,46 +248,79 @@ def _extract_rust_endpoints(repo_root: Path) -> set[Endpoint]:
     routes_root = repo_root / "packages/backend-rust/src/routes"
     mod_rs = routes_root / "mod.rs"
     cache: dict[Path, ParsedRouterFile] = {}
-    stack: list[Path] = []
+    # Scanned once per walk, so files added between runs in one process are still found.
+    rust_files = _scan_rust_files(routes_root)
+    resolved: dict[tuple[Path, str], Path | None] = {}
+    visiting: set[Path] = set()
+    active: list[tuple[Path, str]] = []
+    seen: set[tuple[Path, str]] = set()
+    cut: set[tuple[Path, str]] = set()
+    endpoints: set[Endpoint] = set()
 
     def parse_file(path: Path) -> ParsedRouterFile:
         parsed = cache.get(path)
         if parsed is not None:
             return parsed
-        parsed = _extract_endpoints_from_file(path)
-        cache[path] = parsed
+        text = path.read_bytes()
+        parsed = _extract_endpoints_from_file(text)
         if path == mod_rs:
-            mod_text = path.read_text(encoding="utf-8")
-            health_prefixes = _extract_health_prefixes(mod_text)
-            for prefix in health_prefixes:
-                parsed.nests.append(NestCall(prefix=prefix, module="health"))
+            health_nests = tuple(
+                NestCall(prefix=prefix, module="health") for prefix in _extract_health_prefixes(text)
+            )
+            parsed = parsed._replace(nests=parsed.nests + health_nests)
+        cache[path] = parsed
         return parsed
 
-    def walk(path: Path, prefix: str) -> set[Endpoint]:
-        if path in stack:
-            return set()
-        stack.append(path)
-        parsed = parse_file(path)
-        endpoints: set[Endpoint] = set()
-        for ep in parsed.endpoints:
-            endpoints.add(Endpoint(method=ep.method, path=_join_paths(prefix, ep.path)))
-        for nest in parsed.nests:
-            child_prefix = _join_paths(prefix, nest.prefix)
-            nested_file = _resolve_module_file(routes_root, path, nest.module)
+    def nested_targets(path: Path, prefix: str) -> list[tuple[Path, str]]:
+        targets: list[tuple[Path, str]] = []
+        for nest in parse_file(path).nests:
+            key = (path.parent, nest.module)
+            if key not in resolved:
+                resolved[key] = _resolve_module_file(routes_root, rust_files, path.parent, nest.module)
+            nested_file = resolved[key]
             if nested_file is None:
                 continue
-            endpoints |= walk(nested_file, child_prefix)
-        stack.pop()
-        return endpoints
+            targets.append((nested_file, _join_paths(prefix, nest.prefix)))
+        return targets
+
+    # Depth-first walk over (file, prefix) pairs; a frame is pushed a second time to mark
+    # the end of its subtree. A file already on the active path contributes nothing. A
+    # finished pair is skipped when reached again, unless such a cut-off happened below
+    # it: its result then depends on the active path, so it stays eligible for expansion.
+    work: list[tuple[Path, str, bool]] = [(mod_rs, "", False)]
+    while work:
+        path, prefix, finished = work.pop()
+        key = (path, prefix)
+        if finished:
+            active.pop()
+            visiting.discard(path)
+            if key in cut:
+                cut.discard(key)
+                seen.discard(key)
+            continue
+        if path in visiting:
+            cut.update(active)
+            continue
+        if key in seen:
+            continue
+        seen.add(key)
+        visiting.add(path)
+        active.append(key)
+        work.append((path, prefix, True))
+        endpoints.update(
+            Endpoint(_join_paths(prefix, ep.path), ep.method) for ep in parse_file(path).endpoints
+        )
+        targets = nested_targets(path, prefix)
+        work.extend((target, target_prefix, False) for target, target_prefix in reversed(targets))
 
-    return walk(mod_rs, "")
+    return endpoints
 
 
 def _load_contract_endpoints(repo_root: Path) -> set[Endpoint]:
     contract_path = repo_root / "packages/backend/contract/api-contract.json"
     data = json.loads(contract_path.read_text(encoding="utf-8"))
     return {
-        Endpoint(method=ep["method"].upper(), path=ep["path"])
+        Endpoint(path=ep["path"], method=ep["method"].upper())
         for ep in data.get("endpoints", [])
     }
 
@@ -300,7 +336,7 @@ def _format_ep(ep: Endpoint) -> str:
 
 
 def _iter_sorted(eps: Iterable[Endpoint]) -> list[Endpoint]:
-    return sorted(eps, key=lambda e: (e.path, e.method))
+    return sorted(eps)
 
 
 def main() -> int:
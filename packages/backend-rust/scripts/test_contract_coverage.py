@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import contract_coverage as cc  # noqa: E402
+
+
+class RustStringLiteralTest(unittest.TestCase):
+    def test_literal_body_class_excludes_quote_and_backslash(self) -> None:
+        # `(?:\\.|[^"\\])*` keeps the alternatives disjoint; `[^"]` would make them overlap.
+        for pattern in (cc._STR_LIT_RE, cc._HEALTH_RE):
+            self.assertIn(rb'(?:\\.|[^"\\])*', pattern.pattern)
+            self.assertNotIn(rb'[^"]', pattern.pattern)
+
+    def test_unterminated_escape_run_is_rejected_quickly(self) -> None:
+        # 16 escaped backslashes take ~0.5s to reject with an overlapping body (and grow
+        # exponentially from there), but microseconds with the disjoint one.
+        body = b"\\\\" * 16
+        start = time.perf_counter()
+        self.assertIsNone(cc._STR_LIT_RE.match(b'"' + body))
+        self.assertIsNone(cc._HEALTH_RE.search(b'health_paths.push("' + body))
+        self.assertLess(time.perf_counter() - start, 0.1)
+
+    def test_literal_round_trips(self) -> None:
+        self.assertEqual(cc._extract_string_literal(rb' "/a\\b\"c" rest'), '/a\\b"c')
+        self.assertEqual(cc._extract_string_literal(rb'"\\\\\"", x'), '\\\\"')
+        self.assertEqual(
+            cc._extract_health_prefixes(rb'health_paths.push("/h\"q\\".to_string());'),
+            ['/h"q\\'],
+        )
+
+
+class RustEndpointWalkTest(unittest.TestCase):
+    def _walk(self, files: dict[str, str]) -> set[tuple[str, str]]:
+        with tempfile.TemporaryDirectory() as tmp:
+            routes_root = Path(tmp) / "packages/backend-rust/src/routes"
+            routes_root.mkdir(parents=True)
+            for name, body in files.items():
+                (routes_root / f"{name}.rs").write_text(body, encoding="utf-8")
+            return {(ep.method, ep.path) for ep in cc._extract_rust_endpoints(Path(tmp))}
+
+    def test_module_cut_by_cycle_is_expanded_again_from_another_path(self) -> None:
+        endpoints = self._walk(
+            {
+                "mod": '.nest("", a::router()).nest("", c::router())',
+                "a": '.route("/1", get(h)).nest("", c::router())',
+                "c": '.route("/2", get(h)).nest("/z", a::router())',
+            }
+        )
+        self.assertEqual(endpoints, {("GET", "/1"), ("GET", "/2"), ("GET", "/z/1")})
+
+    def test_module_added_between_walks_is_resolved(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            routes_root = Path(tmp) / "packages/backend-rust/src/routes"
+            routes_root.mkdir(parents=True)
+            (routes_root / "mod.rs").write_text('.nest("/a", a::router())', encoding="utf-8")
+            self.assertEqual(cc._extract_rust_endpoints(Path(tmp)), set())
+
+            (routes_root / "a.rs").write_text('.route("/1", get(h))', encoding="utf-8")
+            endpoints = {(ep.method, ep.path) for ep in cc._extract_rust_endpoints(Path(tmp))}
+            self.assertEqual(endpoints, {("GET", "/a/1")})
+
+
+if __name__ == "__main__":
+    unittest.main()